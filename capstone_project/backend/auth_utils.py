@@ -1,36 +1,67 @@
 """
 Authentication utilities for Cognito integration
 """
-import boto3
 import base64
+import functools
 import hashlib
-import hmac
+import json
 import requests
 
+from cognito_config import COGNITO_CONFIG_FILE, get_cognito_client
+
+# HMAC inner/outer pad translation tables (RFC 2104)
+_TRANS_IPAD = bytes(x ^ 0x36 for x in range(256))
+_TRANS_OPAD = bytes(x ^ 0x5C for x in range(256))
+
+# Cognito config written by notebook 03, kept until a different client is used
+_cognito_config = None
+
+def _load_cognito_config(client_id):
+    """Load the Cognito config, re-reading the file when it is for another client"""
+    global _cognito_config
+    if _cognito_config is None or _cognito_config['client_info']['client_id'] != client_id:
+        with open(COGNITO_CONFIG_FILE, 'r') as f:
+            _cognito_config = json.load(f)
+    return _cognito_config
+
+@functools.lru_cache(maxsize=8)
+def _hmac_pad_states(client_secret):
+    """Precompute SHA-256 states for H(K ^ ipad) and H(K ^ opad) of a client secret
+    
+    The key is fixed per client, so each SECRET_HASH only needs to copy these
+    states instead of re-hashing the padded key blocks.
+    """
+    key = client_secret.encode()
+    block_size = hashlib.sha256().block_size
+    if len(key) > block_size:
+        key = hashlib.sha256(key).digest()
+    key = key.ljust(block_size, b'\x00')
+    
+    inner = hashlib.sha256(key.translate(_TRANS_IPAD))
+    outer = hashlib.sha256(key.translate(_TRANS_OPAD))
+    return inner, outer
+
+def _secret_hash(username, client_id):
+    """Compute the Cognito SECRET_HASH (HMAC-SHA256) for a user/client pair"""
+    client_secret = _load_cognito_config(client_id)['client_info']['client_secret']
+    inner_state, outer_state = _hmac_pad_states(client_secret)
+    
+    inner = inner_state.copy()
+    inner.update((username + client_id).encode())
+    outer = outer_state.copy()
+    outer.update(inner.digest())
+    return base64.b64encode(outer.digest()).decode()
+
 def reauthenticate_user(client_id, username="testuser", password="MyPassword123!"):
     """
     Authenticate user with Cognito and get access token
     """
     try:
-        # Load cognito config
-        import json
-        with open('../notebooks/environments/cognito_config.json', 'r') as f:
-            config = json.load(f)
-        
-        client_secret = config['client_info']['client_secret']
-        
-        # Calculate secret hash
-        message = username + client_id
-        secret_hash = base64.b64encode(
-            hmac.new(
-                client_secret.encode(),
-                message.encode(),
-                digestmod=hashlib.sha256
-            ).digest()
-        ).decode()
+        # Calculate secret hash (config and HMAC pad states are cached per client)
+        secret_hash = _secret_hash(username, client_id)
         
         # Authenticate with Cognito
-        cognito_client = boto3.client('cognito-idp')
+        cognito_client = get_cognito_client()
         
         response = cognito_client.initiate_auth(
             ClientId=client_id,
@@ -5,9 +5,10 @@ Creates Browser Tools session for web research
 
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from botocore.exceptions import ClientError
 from bedrock_agentcore.services.browser_tools import BrowserToolsClient
+from client_config import pooled_config
 
 # Configuration
 REGION = "us-west-2"
@@ -21,7 +22,8 @@ def create_browser_tools_session():
     """Create AgentCore Browser Tools session for travel research"""
     
     print("🌐 Creating AgentCore Browser Tools Session...")
-    client = BrowserToolsClient(region_name=REGION)
+    with pooled_config():
+        client = BrowserToolsClient(region_name=REGION)
     
     try:
         # Create browser session
@@ -108,11 +110,11 @@ if __name__ == "__main__":
             "real_time_research"
         ],
         "test_status": "passed" if test_success else "failed",
-        "created_at": datetime.now().isoformat()
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
     }
     
     with open('browser_tools_info.json', 'w') as f:
-        json.dump(session_info, f, indent=2)
+        f.write(json.dumps(session_info, indent=2))
     
     print(f"\n💾 Session information saved to browser_tools_info.json")
     print(f"Session ID: {session_id}")
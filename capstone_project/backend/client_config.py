@@ -0,0 +1,40 @@
+"""
+Shared botocore configuration for AgentCore toolkit clients
+Keeps HTTPS connections alive and pooled across repeated setup calls
+"""
+
+import threading
+from contextlib import contextmanager
+
+import boto3
+from botocore.config import Config
+
+POOLED_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 5}
+)
+
+_PATCH_LOCK = threading.Lock()
+
+
+@contextmanager
+def pooled_config():
+    """Build the boto3 clients created inside the block with POOLED_CLIENT_CONFIG
+
+    The toolkit clients (BrowserToolsClient, CodeInterpreterClient) don't accept
+    a botocore config, so construct them inside this block and their boto3
+    clients are created once, already pooled.
+    """
+    original_client = boto3.session.Session.client
+
+    def client(self, *args, config=None, **kwargs):
+        config = POOLED_CLIENT_CONFIG if config is None else config.merge(POOLED_CLIENT_CONFIG)
+        return original_client(self, *args, config=config, **kwargs)
+
+    with _PATCH_LOCK:
+        boto3.session.Session.client = client
+        try:
+            yield
+        finally:
+            boto3.session.Session.client = original_client
@@ -8,6 +8,7 @@ import logging
 from datetime import datetime
 from botocore.exceptions import ClientError
 from bedrock_agentcore.services.code_interpreter import CodeInterpreterClient
+from client_config import pooled_config
 
 # Configuration
 REGION = "us-west-2"
@@ -21,7 +22,8 @@ def create_code_interpreter_runtime():
     """Create AgentCore Code Interpreter runtime for travel calculations"""
     
     print("🧮 Creating AgentCore Code Interpreter Runtime...")
-    client = CodeInterpreterClient(region_name=REGION)
+    with pooled_config():
+        client = CodeInterpreterClient(region_name=REGION)
     
     # Required packages for travel calculations
     packages = [
@@ -136,7 +138,7 @@ if __name__ == "__main__":
     }
     
     with open('code_interpreter_info.json', 'w') as f:
-        json.dump(runtime_info, f, indent=2)
+        f.write(json.dumps(runtime_info, indent=2))
     
     print(f"\n💾 Runtime information saved to code_interpreter_info.json")
     print(f"Runtime ID: {runtime_id}")
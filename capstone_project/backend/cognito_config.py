@@ -3,11 +3,33 @@ Cognito Configuration Management
 Handles saving and loading Cognito OAuth configuration to avoid recreating resources
 """
 
+import functools
 import json
-import os
 from pathlib import Path
 
-COGNITO_CONFIG_FILE = "../notebooks/environments/cognito_config.json"
+import boto3
+from botocore.config import Config
+
+COGNITO_CONFIG_FILE = Path(__file__).resolve().parent.parent / "notebooks" / "environments" / "cognito_config.json"
+REQUIRED_AUTH_FLOWS = ('ALLOW_USER_PASSWORD_AUTH', 'ALLOW_REFRESH_TOKEN_AUTH')
+
+# Shared cognito-idp clients keyed by region, so repeated setup/auth calls
+# reuse the same connection pool instead of rebuilding a client each time
+_COGNITO_CLIENTS = {}
+_COGNITO_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={'mode': 'adaptive'}
+)
+
+
+def get_cognito_client(region=None):
+    """Return a cached cognito-idp client for the given region"""
+    client = _COGNITO_CLIENTS.get(region)
+    if client is None:
+        client = boto3.client('cognito-idp', region_name=region, config=_COGNITO_CLIENT_CONFIG)
+        _COGNITO_CLIENTS[region] = client
+    return client
 
 
 def save_cognito_config(cognito_result, gateway_name):
@@ -19,15 +41,12 @@ def save_cognito_config(cognito_result, gateway_name):
     }
     
     with open(COGNITO_CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+        f.write(json.dumps(config, indent=2))
     
     print(f"💾 Cognito config saved to {COGNITO_CONFIG_FILE}")
 
 def load_cognito_config(gateway_name):
     """Load existing Cognito configuration from file"""
-    if not os.path.exists(COGNITO_CONFIG_FILE):
-        return None
-    
     try:
         with open(COGNITO_CONFIG_FILE, "r") as f:
             config = json.load(f)
@@ -38,6 +57,8 @@ def load_cognito_config(gateway_name):
                 "authorizer_config": config["authorizer_config"],
                 "client_info": config["client_info"]
             }
+    except FileNotFoundError:
+        return None
     except Exception as e:
         print(f"⚠️ Error loading Cognito config: {e}")
     
@@ -45,9 +66,7 @@ def load_cognito_config(gateway_name):
 
 def ensure_user_password_auth(client_id, user_pool_id, region='us-east-1'):
     """Ensure Cognito client has USER_PASSWORD_AUTH enabled"""
-    import boto3
-    
-    cognito_client = boto3.client('cognito-idp', region_name=region)
+    cognito_client = get_cognito_client(region)
     
     try:
         # Get current client config
@@ -58,12 +77,12 @@ def ensure_user_password_auth(client_id, user_pool_id, region='us-east-1'):
         
         current_flows = response['UserPoolClient'].get('ExplicitAuthFlows', [])
         
-        # Check if USER_PASSWORD_AUTH is already enabled
-        if 'ALLOW_USER_PASSWORD_AUTH' not in current_flows:
+        # Check if the required auth flows are already enabled
+        if not set(REQUIRED_AUTH_FLOWS).issubset(current_flows):
             print("🔧 Enabling USER_PASSWORD_AUTH flow...")
             
-            # Add required auth flows
-            updated_flows = list(set(current_flows + ['ALLOW_USER_PASSWORD_AUTH', 'ALLOW_REFRESH_TOKEN_AUTH']))
+            # Add required auth flows, keeping existing order stable
+            updated_flows = list(dict.fromkeys((*current_flows, *REQUIRED_AUTH_FLOWS)))
             
             # Update client with auth flows
             cognito_client.update_user_pool_client(
@@ -80,9 +99,7 @@ def ensure_user_password_auth(client_id, user_pool_id, region='us-east-1'):
 
 def activate_oauth_client_credentials(client_info, region='us-east-1'):
     """Enable client_credentials OAuth flow for Gateway authentication"""
-    import boto3
-    
-    cognito_client = boto3.client('cognito-idp', region_name=region)
+    cognito_client = get_cognito_client(region)
     
     try:
         cognito_client.update_user_pool_client(
@@ -97,10 +114,48 @@ def activate_oauth_client_credentials(client_info, region='us-east-1'):
         print(f"⚠️ Error enabling OAuth flow: {e}")
         raise
 
+@functools.lru_cache(maxsize=None)
+def _list_user_pools(region=None):
+    """List Cognito user pools once per region"""
+    return tuple(get_cognito_client(region).list_user_pools(MaxResults=60)['UserPools'])
+
+def _reconstruct_cognito_result(user_pool_id, region=None):
+    """Rebuild the create_oauth_authorizer_with_cognito result for an existing pool"""
+    cognito_client = get_cognito_client(region)
+    region = cognito_client.meta.region_name
+    
+    clients = cognito_client.list_user_pool_clients(UserPoolId=user_pool_id, MaxResults=1)['UserPoolClients']
+    if not clients:
+        return None
+    
+    pool_client = cognito_client.describe_user_pool_client(
+        UserPoolId=user_pool_id,
+        ClientId=clients[0]['ClientId']
+    )['UserPoolClient']
+    domain_prefix = cognito_client.describe_user_pool(UserPoolId=user_pool_id)['UserPool'].get('Domain')
+    if not domain_prefix or not pool_client.get('AllowedOAuthScopes'):
+        return None
+    
+    print(f"♻️ Reusing Cognito client {pool_client['ClientId']} from pool {user_pool_id}")
+    return {
+        "authorizer_config": {
+            "customJWTAuthorizer": {
+                "allowedClients": [pool_client['ClientId']],
+                "discoveryUrl": f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/openid-configuration"
+            }
+        },
+        "client_info": {
+            "client_id": pool_client['ClientId'],
+            "client_secret": pool_client.get('ClientSecret'),
+            "user_pool_id": user_pool_id,
+            "token_endpoint": f"https://{domain_prefix}.auth.{region}.amazoncognito.com/oauth2/token",
+            "scope": pool_client['AllowedOAuthScopes'][0],
+            "domain_prefix": domain_prefix
+        }
+    }
+
 def setup_cognito_oauth(client, gateway_name):
     """Setup Cognito OAuth, reusing existing config if available"""
-    import boto3
-    
     # Try to load existing config
     cognito_result = load_cognito_config(gateway_name)
     
@@ -109,24 +164,21 @@ def setup_cognito_oauth(client, gateway_name):
         activate_oauth_client_credentials(cognito_result['client_info'])
         return cognito_result
     
-    # Check for existing user pools with same name
-    cognito_client = boto3.client('cognito-idp')
+    # Reuse an existing user pool with the same name instead of creating another
+    cognito_result = None
     try:
-        pools = cognito_client.list_user_pools(MaxResults=60)['UserPools']
-        existing_pool = next((p for p in pools if p['Name'] == gateway_name), None)
+        existing_pool = next((p for p in _list_user_pools() if p['Name'] == gateway_name), None)
         
         if existing_pool:
             print(f"⚠️ Found existing Cognito pool: {existing_pool['Name']}")
-            # You would need to reconstruct cognito_result from existing resources
-            # For now, create new one
-            cognito_result = client.create_oauth_authorizer_with_cognito(gateway_name)
+            cognito_result = _reconstruct_cognito_result(existing_pool['Id'])
     except Exception as e:
-        print(f"Warning: Could not check existing pools: {e}")
-        cognito_result = client.create_oauth_authorizer_with_cognito(gateway_name)
+        print(f"Warning: Could not reuse existing pools: {e}")
     
-    # Create new Cognito resources
-    print("🔐 Creating new Cognito OAuth configuration...")
-    cognito_result = client.create_oauth_authorizer_with_cognito(gateway_name)
+    if not cognito_result:
+        # Create new Cognito resources
+        print("🔐 Creating new Cognito OAuth configuration...")
+        cognito_result = client.create_oauth_authorizer_with_cognito(gateway_name)
     
     # Save for future use
     save_cognito_config(cognito_result, gateway_name)
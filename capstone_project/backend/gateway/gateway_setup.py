@@ -3,13 +3,29 @@ TravelMate AI - AgentCore Gateway Setup
 Creates Gateway with all 4 travel API integrations
 """
 
+import functools
 import json
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import boto3
+from botocore.config import Config
 from bedrock_agentcore_starter_toolkit.operations.gateway.client import GatewayClient
 
 # Configuration
 REGION = "us-west-2"
 GATEWAY_NAME = "TravelMateGateway"
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openapi_specs")
+SPEC_CACHE_DIR = os.path.join(SPEC_DIR, ".cache")  # Compact spec payloads from previous runs
+
+# Pooled keepalive connections for the Gateway control-plane client, so the
+# target creation calls reuse TLS connections instead of opening new ones
+GATEWAY_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 5}
+)
 
 # API Keys (load from environment)
 API_KEYS = {
@@ -19,17 +35,93 @@ API_KEYS = {
     "exchangerate": os.getenv("EXCHANGERATE_API_KEY")
 }
 
+# Gateway targets: (label, OpenAPI spec file, credential settings)
+GATEWAY_TARGETS = [
+    ("Aviationstack (flights)", "aviationstack.json", {
+        "api_key": API_KEYS["aviationstack"],
+        "credential_location": "QUERY_PARAMETER",
+        "credential_parameter_name": "access_key"
+    }),
+    ("Hotelbeds (hotels)", "hotelbeds.json", {
+        "api_key": API_KEYS["hotelbeds"],
+        "credential_location": "HEADER",
+        "credential_parameter_name": "Api-Key"
+    }),
+    ("OpenWeatherMap (weather)", "openweathermap.json", {
+        "api_key": API_KEYS["openweathermap"],
+        "credential_location": "QUERY_PARAMETER",
+        "credential_parameter_name": "appid"
+    }),
+    ("ExchangeRate-API (currency)", "exchangerate.json", {
+        "api_key": API_KEYS["exchangerate"],
+        "credential_location": "HEADER",
+        "credential_parameter_name": "Authorization"
+    })
+]
+
+def _build_gateway_client():
+    """Create the GatewayClient with a pooled control-plane client
+    
+    GatewayClient doesn't accept a botocore config; its control-plane client is
+    the only one the target creation calls use, so that one is replaced.
+    """
+    client = GatewayClient(region_name=REGION)
+    client.client = boto3.client("bedrock-agentcore-control", region_name=REGION, config=GATEWAY_CLIENT_CONFIG)
+    return client
+
+# Build the Gateway client in the background at import so botocore's service
+# model loading overlaps with the rest of startup
+_client_executor = ThreadPoolExecutor(max_workers=1)
+_client_future = _client_executor.submit(_build_gateway_client)
+_client_executor.shutdown(wait=False)
+
 def load_openapi_spec(filename):
-    """Load OpenAPI specification from file"""
-    with open(f"openapi_specs/{filename}", "r") as f:
-        return json.load(f)
+    """Load raw OpenAPI specification JSON bytes from file"""
+    with open(os.path.join(SPEC_DIR, filename), "rb") as f:
+        return f.read()
+
+@functools.lru_cache(maxsize=None)
+def _spec_payload(filename):
+    """Compact JSON payload for a spec, cached in memory and in a sidecar file"""
+    spec_path = os.path.join(SPEC_DIR, filename)
+    cache_path = os.path.join(SPEC_CACHE_DIR, filename)
+    
+    # Reuse the sidecar from a previous run unless the spec changed since
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(spec_path):
+            with open(cache_path, "rb") as f:
+                return f.read().decode("ascii")
+    except OSError:
+        pass
+    
+    # ensure_ascii (the default) keeps the payload pure ASCII, so it is stored
+    # one byte per character and UTF-8 encodes for the request as a plain copy
+    payload = json.dumps(json.loads(load_openapi_spec(filename)), separators=(",", ":"))
+    # Write to a temp file and rename it into place, so an interrupted run
+    # never leaves a truncated sidecar that looks newer than the spec
+    os.makedirs(SPEC_CACHE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=SPEC_CACHE_DIR, delete=False) as f:
+        f.write(payload.encode("ascii"))
+    os.replace(f.name, cache_path)
+    return payload
+
+def add_gateway_target(client, gateway, spec_file, credentials):
+    """Register one OpenAPI spec as an MCP target on the gateway"""
+    return client.create_mcp_gateway_target(
+        gateway=gateway,
+        target_type="openApiSchema",
+        target_payload={
+            "inlinePayload": _spec_payload(spec_file)
+        },
+        credentials=credentials
+    )
 
 def create_travel_gateway():
     """Create TravelMate Gateway with all targets"""
     
-    # Initialize Gateway client
+    # Initialize Gateway client (construction started at import)
     print("Initializing Gateway client...")
-    client = GatewayClient(region_name=REGION)
+    client = _client_future.result()
     
     # Set up Cognito OAuth (EZ Auth)
     print("Setting up OAuth with Cognito...")
@@ -49,77 +141,16 @@ def create_travel_gateway():
     print(f"   MCP Endpoint: {gateway.get_mcp_url()}")
     print(f"   Gateway ID: {gateway.gateway_id}")
     
-    # Add Aviationstack target
-    print("\n1️⃣ Adding Aviationstack (flights)...")
-    aviationstack_spec = load_openapi_spec("aviationstack.json")
-    
-    aviationstack_target = client.create_mcp_gateway_target(
-        gateway=gateway,
-        target_type="openApiSchema",
-        target_payload={
-            "inlinePayload": json.dumps(aviationstack_spec)
-        },
-        credentials={
-            "api_key": API_KEYS["aviationstack"],
-            "credential_location": "QUERY_PARAMETER",
-            "credential_parameter_name": "access_key"
+    # Add all targets concurrently; they only depend on the gateway
+    print(f"\nAdding {len(GATEWAY_TARGETS)} API targets...")
+    with ThreadPoolExecutor(max_workers=len(GATEWAY_TARGETS)) as executor:
+        futures = {
+            executor.submit(add_gateway_target, client, gateway, spec_file, credentials): label
+            for label, spec_file, credentials in GATEWAY_TARGETS
         }
-    )
-    print("   ✅ Aviationstack target added")
-    
-    # Add Hotelbeds target
-    print("\n2️⃣ Adding Hotelbeds (hotels)...")
-    hotelbeds_spec = load_openapi_spec("hotelbeds.json")
-    
-    hotelbeds_target = client.create_mcp_gateway_target(
-        gateway=gateway,
-        target_type="openApiSchema",
-        target_payload={
-            "inlinePayload": json.dumps(hotelbeds_spec)
-        },
-        credentials={
-            "api_key": API_KEYS["hotelbeds"],
-            "credential_location": "HEADER",
-            "credential_parameter_name": "Api-Key"
-        }
-    )
-    print("   ✅ Hotelbeds target added")
-    
-    # Add OpenWeatherMap target
-    print("\n3️⃣ Adding OpenWeatherMap (weather)...")
-    weather_spec = load_openapi_spec("openweathermap.json")
-    
-    weather_target = client.create_mcp_gateway_target(
-        gateway=gateway,
-        target_type="openApiSchema",
-        target_payload={
-            "inlinePayload": json.dumps(weather_spec)
-        },
-        credentials={
-            "api_key": API_KEYS["openweathermap"],
-            "credential_location": "QUERY_PARAMETER",
-            "credential_parameter_name": "appid"
-        }
-    )
-    print("   ✅ OpenWeatherMap target added")
-    
-    # Add ExchangeRate-API target
-    print("\n4️⃣ Adding ExchangeRate-API (currency)...")
-    currency_spec = load_openapi_spec("exchangerate.json")
-    
-    currency_target = client.create_mcp_gateway_target(
-        gateway=gateway,
-        target_type="openApiSchema",
-        target_payload={
-            "inlinePayload": json.dumps(currency_spec)
-        },
-        credentials={
-            "api_key": API_KEYS["exchangerate"],
-            "credential_location": "HEADER",
-            "credential_parameter_name": "Authorization"
-        }
-    )
-    print("   ✅ ExchangeRate-API target added")
+        for future in as_completed(futures):
+            future.result()
+            print(f"   ✅ {futures[future]} target added")
     
     # Print OAuth credentials
     print("\n" + "="*60)
@@ -3,18 +3,76 @@ TravelMate AI - Gateway Integration Tests
 Tests all 4 travel API integrations through AgentCore Gateway
 """
 
+import atexit
 import json
+import logging
+import queue
 import requests
 import os
-from datetime import datetime, timedelta
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from logging.handlers import QueueHandler, QueueListener
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Test configuration
 GATEWAY_MCP_URL = os.getenv("GATEWAY_MCP_URL")  # Set after gateway creation
 OAUTH_TOKEN = os.getenv("OAUTH_TOKEN")  # Get from Cognito
 
+PASS = "✅ PASS"
+
+# Hotel search dates (check-in tomorrow, check-out day after), computed once
+_TOMORROW = (date.today() + timedelta(days=1)).isoformat()
+_DAY_AFTER = (date.today() + timedelta(days=2)).isoformat()
+
+class _TestBufferFilter(logging.Filter):
+    """Hold back records logged from a test worker in that test's buffer"""
+    
+    def filter(self, record):
+        lines = getattr(_current_test, "lines", None)
+        if lines is None:
+            return True
+        lines.append(record.getMessage())
+        return False
+
+# Worker threads only enqueue log records; a single listener thread writes them
+_current_test = threading.local()
+_log_queue = queue.Queue()
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.addFilter(_TestBufferFilter())
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = QueueListener(_log_queue, _stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+log = logging.getLogger("tg")
+log.setLevel(logging.INFO)
+log.addHandler(_queue_handler)
+log.propagate = False
+
+# Shared session so all tests reuse one keep-alive connection to the gateway
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"})  # MCP test calls are read-only lookups
+    )
+))
+_SESSION.headers.update({
+    "Authorization": f"Bearer {OAUTH_TOKEN}",
+    "Content-Type": "application/json"
+})
+
 def test_search_flights():
     """Test Aviationstack flight search"""
-    print("🧪 Testing flight search...")
+    log.info("🧪 Testing flight search...")
     
     payload = {
         "method": "searchFlights",
@@ -29,29 +87,25 @@ def test_search_flights():
     
     if response and "data" in response:
         flights = response["data"]
-        print(f"   ✅ Found {len(flights)} flights")
+        log.info(f"   ✅ Found {len(flights)} flights")
         if flights:
             flight = flights[0]
-            print(f"   📍 {flight.get('airline', {}).get('name', 'Unknown')} - {flight.get('flight', {}).get('number', 'N/A')}")
+            log.info(f"   📍 {flight.get('airline', {}).get('name', 'Unknown')} - {flight.get('flight', {}).get('number', 'N/A')}")
     else:
-        print("   ❌ Flight search failed")
+        log.info("   ❌ Flight search failed")
     
     return response
 
 def test_search_hotels():
     """Test Hotelbeds hotel search"""
-    print("🧪 Testing hotel search...")
-    
-    # Calculate dates (check-in tomorrow, check-out day after)
-    checkin = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-    checkout = (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d")
+    log.info("🧪 Testing hotel search...")
     
     payload = {
         "method": "searchHotels",
         "params": {
             "stay": {
-                "checkIn": checkin,
-                "checkOut": checkout
+                "checkIn": _TOMORROW,
+                "checkOut": _DAY_AFTER
             },
             "occupancies": [
                 {
@@ -70,18 +124,18 @@ def test_search_hotels():
     
     if response and "hotels" in response:
         hotels = response["hotels"].get("hotels", [])
-        print(f"   ✅ Found {len(hotels)} hotels")
+        log.info(f"   ✅ Found {len(hotels)} hotels")
         if hotels:
             hotel = hotels[0]
-            print(f"   🏨 {hotel.get('name', 'Unknown Hotel')} - {hotel.get('categoryCode', 'N/A')} stars")
+            log.info(f"   🏨 {hotel.get('name', 'Unknown Hotel')} - {hotel.get('categoryCode', 'N/A')} stars")
     else:
-        print("   ❌ Hotel search failed")
+        log.info("   ❌ Hotel search failed")
     
     return response
 
 def test_get_hotel_details():
     """Test Hotelbeds hotel details"""
-    print("🧪 Testing hotel details...")
+    log.info("🧪 Testing hotel details...")
     
     # Use a sample hotel code (this would come from search results)
     payload = {
@@ -95,17 +149,17 @@ def test_get_hotel_details():
     
     if response and "hotel" in response:
         hotel = response["hotel"]
-        print(f"   ✅ Hotel details retrieved")
-        print(f"   🏨 {hotel.get('name', 'Unknown Hotel')}")
-        print(f"   📍 {hotel.get('address', {}).get('content', 'Address not available')}")
+        log.info(f"   ✅ Hotel details retrieved")
+        log.info(f"   🏨 {hotel.get('name', 'Unknown Hotel')}")
+        log.info(f"   📍 {hotel.get('address', {}).get('content', 'Address not available')}")
     else:
-        print("   ❌ Hotel details failed")
+        log.info("   ❌ Hotel details failed")
     
     return response
 
 def test_get_weather():
     """Test OpenWeatherMap current weather"""
-    print("🧪 Testing current weather...")
+    log.info("🧪 Testing current weather...")
     
     payload = {
         "method": "getCurrentWeather",
@@ -121,16 +175,16 @@ def test_get_weather():
         weather = response
         temp = weather["main"]["temp"]
         desc = weather["weather"][0]["description"]
-        print(f"   ✅ Weather retrieved")
-        print(f"   🌤️ Rome: {temp}°C, {desc}")
+        log.info(f"   ✅ Weather retrieved")
+        log.info(f"   🌤️ Rome: {temp}°C, {desc}")
     else:
-        print("   ❌ Weather retrieval failed")
+        log.info("   ❌ Weather retrieval failed")
     
     return response
 
 def test_get_weather_forecast():
     """Test OpenWeatherMap weather forecast"""
-    print("🧪 Testing weather forecast...")
+    log.info("🧪 Testing weather forecast...")
     
     payload = {
         "method": "getWeatherForecast",
@@ -145,20 +199,20 @@ def test_get_weather_forecast():
     
     if response and "list" in response:
         forecasts = response["list"]
-        print(f"   ✅ Forecast retrieved ({len(forecasts)} periods)")
+        log.info(f"   ✅ Forecast retrieved ({len(forecasts)} periods)")
         if forecasts:
             forecast = forecasts[0]
             temp = forecast["main"]["temp"]
             desc = forecast["weather"][0]["description"]
-            print(f"   🌤️ Florence: {temp}°C, {desc}")
+            log.info(f"   🌤️ Florence: {temp}°C, {desc}")
     else:
-        print("   ❌ Weather forecast failed")
+        log.info("   ❌ Weather forecast failed")
     
     return response
 
 def test_get_exchange_rates():
     """Test ExchangeRate-API exchange rates"""
-    print("🧪 Testing exchange rates...")
+    log.info("🧪 Testing exchange rates...")
     
     payload = {
         "method": "getExchangeRates",
@@ -171,17 +225,17 @@ def test_get_exchange_rates():
     
     if response and "rates" in response:
         rates = response["rates"]
-        print(f"   ✅ Exchange rates retrieved")
-        print(f"   💱 USD to EUR: {rates.get('EUR', 'N/A')}")
-        print(f"   💱 USD to GBP: {rates.get('GBP', 'N/A')}")
+        log.info(f"   ✅ Exchange rates retrieved")
+        log.info(f"   💱 USD to EUR: {rates.get('EUR', 'N/A')}")
+        log.info(f"   💱 USD to GBP: {rates.get('GBP', 'N/A')}")
     else:
-        print("   ❌ Exchange rates failed")
+        log.info("   ❌ Exchange rates failed")
     
     return response
 
 def test_convert_currency():
     """Test ExchangeRate-API currency conversion"""
-    print("🧪 Testing currency conversion...")
+    log.info("🧪 Testing currency conversion...")
     
     payload = {
         "method": "convertCurrency",
@@ -197,55 +251,68 @@ def test_convert_currency():
     if response and "result" in response:
         result = response["result"]
         rate = response.get("info", {}).get("rate", "N/A")
-        print(f"   ✅ Currency conversion successful")
-        print(f"   💱 $1000 USD = €{result} EUR (rate: {rate})")
+        log.info(f"   ✅ Currency conversion successful")
+        log.info(f"   💱 $1000 USD = €{result} EUR (rate: {rate})")
     else:
-        print("   ❌ Currency conversion failed")
+        log.info("   ❌ Currency conversion failed")
     
     return response
 
 def make_mcp_request(payload):
     """Make MCP request to Gateway"""
     if not GATEWAY_MCP_URL:
-        print("   ❌ GATEWAY_MCP_URL not set")
+        log.info("   ❌ GATEWAY_MCP_URL not set")
         return None
     
     if not OAUTH_TOKEN:
-        print("   ❌ OAUTH_TOKEN not set")
+        log.info("   ❌ OAUTH_TOKEN not set")
         return None
     
-    headers = {
-        "Authorization": f"Bearer {OAUTH_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     try:
-        response = requests.post(GATEWAY_MCP_URL, json=payload, headers=headers)
+        response = _SESSION.post(GATEWAY_MCP_URL, json=payload, timeout=(3, 30))
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"   ❌ Request failed: {e}")
+        log.info(f"   ❌ Request failed: {e}")
         return None
     except json.JSONDecodeError as e:
-        print(f"   ❌ JSON decode failed: {e}")
+        log.info(f"   ❌ JSON decode failed: {e}")
         return None
 
+def _run_test(test_name, test_func):
+    """Run a single test in a worker thread, returning its status
+    
+    The test's log lines are buffered and emitted as one grouped record when it
+    finishes, so concurrent tests don't interleave their output.
+    """
+    _current_test.lines = [f"\n📋 {test_name}", "-" * 40]
+    try:
+        result = test_func()
+        return PASS if result else "❌ FAIL"
+    except Exception as e:
+        log.info(f"   ❌ Test error: {e}")
+        return "❌ ERROR"
+    finally:
+        lines = _current_test.lines
+        del _current_test.lines
+        log.info("\n".join(lines))
+
 def run_all_tests():
     """Run all integration tests"""
-    print("🚀 Starting TravelMate Gateway Integration Tests")
-    print("=" * 60)
+    log.info("🚀 Starting TravelMate Gateway Integration Tests")
+    log.info("=" * 60)
     
     # Check environment
     if not GATEWAY_MCP_URL:
-        print("❌ Missing GATEWAY_MCP_URL environment variable")
-        print("   Set it after creating the gateway:")
-        print("   export GATEWAY_MCP_URL=https://your-gateway-url/mcp")
+        log.info("❌ Missing GATEWAY_MCP_URL environment variable")
+        log.info("   Set it after creating the gateway:")
+        log.info("   export GATEWAY_MCP_URL=https://your-gateway-url/mcp")
         return
     
     if not OAUTH_TOKEN:
-        print("❌ Missing OAUTH_TOKEN environment variable")
-        print("   Get OAuth token from Cognito and set:")
-        print("   export OAUTH_TOKEN=your_oauth_token")
+        log.info("❌ Missing OAUTH_TOKEN environment variable")
+        log.info("   Get OAuth token from Cognito and set:")
+        log.info("   export OAUTH_TOKEN=your_oauth_token")
         return
     
     # Run tests
@@ -259,35 +326,38 @@ def run_all_tests():
         ("Currency Conversion", test_convert_currency)
     ]
     
-    results = {}
+    # Tests are independent network calls, so run them concurrently; each
+    # test's output is logged as one block when it finishes
+    outcomes = {}
+    passed = 0
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        futures = {
+            executor.submit(_run_test, test_name, test_func): test_name
+            for test_name, test_func in tests
+        }
+        for future in as_completed(futures):
+            status = future.result()
+            outcomes[futures[future]] = status
+            passed += status == PASS
     
-    for test_name, test_func in tests:
-        print(f"\n📋 {test_name}")
-        print("-" * 40)
-        try:
-            result = test_func()
-            results[test_name] = "✅ PASS" if result else "❌ FAIL"
-        except Exception as e:
-            print(f"   ❌ Test error: {e}")
-            results[test_name] = "❌ ERROR"
+    results = {test_name: outcomes[test_name] for test_name, _ in tests}
     
     # Summary
-    print("\n" + "=" * 60)
-    print("📊 TEST SUMMARY")
-    print("=" * 60)
+    log.info("\n" + "=" * 60)
+    log.info("📊 TEST SUMMARY")
+    log.info("=" * 60)
     
     for test_name, status in results.items():
-        print(f"{status} {test_name}")
+        log.info(f"{status} {test_name}")
     
-    passed = sum(1 for status in results.values() if "✅" in status)
     total = len(results)
     
-    print(f"\n🎯 Results: {passed}/{total} tests passed")
+    log.info(f"\n🎯 Results: {passed}/{total} tests passed")
     
     if passed == total:
-        print("🎉 All tests passed! Gateway is ready for production.")
+        log.info("🎉 All tests passed! Gateway is ready for production.")
     else:
-        print("⚠️ Some tests failed. Check API keys and Gateway configuration.")
+        log.info("⚠️ Some tests failed. Check API keys and Gateway configuration.")
 
 if __name__ == "__main__":
     run_all_tests()
\ No newline at end of file
@@ -5,14 +5,18 @@ Handles OAuth2 3-legged authentication flow with AgentCore Identity
 """
 
 import time
+import random
+import socket
+import asyncio
 import uvicorn
 import logging
 import argparse
 import requests
 
 from datetime import timedelta
+from requests.adapters import HTTPAdapter
 from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import Response
 from bedrock_agentcore.services.identity import IdentityClient, UserTokenIdentifier
 
 # Configuration constants
@@ -23,6 +27,42 @@ USER_IDENTIFIER_ENDPOINT = "/userIdentifier/token"
 
 logger = logging.getLogger(__name__)
 
+# Static success page, encoded once and served as-is on every callback
+_SUCCESS_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>OAuth2 Success</title>
+    <style>
+        body {
+            margin: 0; padding: 0; height: 100vh;
+            display: flex; justify-content: center; align-items: center;
+            font-family: Arial, sans-serif; background-color: #f5f5f5;
+        }
+        .container {
+            text-align: center; padding: 2rem; background-color: white;
+            border-radius: 8px; box-shadow: 0 2px 10px rgba(0, 0, 0, 0.1);
+        }
+        h1 { color: #28a745; margin: 0; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>✅ Google Drive OAuth2 Authorization Successful!</h1>
+        <p>You can now close this window and return to the application.</p>
+    </div>
+</body>
+</html>
+""".encode("utf-8")
+_SUCCESS_HEADERS = {
+    "content-type": "text/html; charset=utf-8",
+    "content-length": str(len(_SUCCESS_HTML)),
+}
+
+# Keep-alive session shared by the readiness probe and token hand-off
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0))
+
 class OAuth2CallbackServer:
     def __init__(self, region: str):
         self.identity_client = IdentityClient(region=region)
@@ -54,37 +94,20 @@ class OAuth2CallbackServer:
                     detail="Internal Server Error",
                 )
 
-            self.identity_client.complete_resource_token_auth(
-                session_uri=session_id, user_identifier=self.user_token_identifier
+            # Blocking boto3 call; run it off the event loop so /ping and the
+            # other endpoints keep being served while AgentCore responds
+            await asyncio.to_thread(
+                self.identity_client.complete_resource_token_auth,
+                session_uri=session_id,
+                user_identifier=self.user_token_identifier,
             )
 
-            html_content = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>OAuth2 Success</title>
-                <style>
-                    body {
-                        margin: 0; padding: 0; height: 100vh;
-                        display: flex; justify-content: center; align-items: center;
-                        font-family: Arial, sans-serif; background-color: #f5f5f5;
-                    }
-                    .container {
-                        text-align: center; padding: 2rem; background-color: white;
-                        border-radius: 8px; box-shadow: 0 2px 10px rgba(0, 0, 0, 0.1);
-                    }
-                    h1 { color: #28a745; margin: 0; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <h1>✅ Google Drive OAuth2 Authorization Successful!</h1>
-                    <p>You can now close this window and return to the application.</p>
-                </div>
-            </body>
-            </html>
-            """
-            return HTMLResponse(content=html_content, status_code=200)
+            return Response(
+                content=_SUCCESS_HTML,
+                status_code=200,
+                headers=_SUCCESS_HEADERS,
+                media_type="text/html",
+            )
 
     def get_app(self) -> FastAPI:
         return self.app
@@ -94,29 +117,48 @@ def get_oauth2_callback_url() -> str:
 
 def store_token_in_oauth2_callback_server(user_token_value: str):
     if user_token_value:
-        requests.post(
+        _SESSION.post(
             f"http://localhost:{OAUTH2_CALLBACK_SERVER_PORT}{USER_IDENTIFIER_ENDPOINT}",
             json={"user_token": user_token_value},
             timeout=2,
         )
 
+def _tcp_ready(port: int, timeout: float) -> bool:
+    """Check whether anything is accepting connections on the local port"""
+    try:
+        socket.create_connection(("127.0.0.1", port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+def _ping_ok() -> bool:
+    """Check that the callback app itself answers /ping"""
+    try:
+        response = _SESSION.get(
+            f"http://localhost:{OAUTH2_CALLBACK_SERVER_PORT}{PING_ENDPOINT}",
+            timeout=1,
+        )
+        return response.status_code == status.HTTP_200_OK
+    except requests.exceptions.RequestException:
+        return False
+
 def wait_for_oauth2_server_to_be_ready(duration: timedelta = timedelta(seconds=40)) -> bool:
-    timeout_in_seconds = duration.seconds
-    start_time = time.time()
-    
-    while time.time() - start_time < timeout_in_seconds:
-        try:
-            response = requests.get(
-                f"http://localhost:{OAUTH2_CALLBACK_SERVER_PORT}{PING_ENDPOINT}",
-                timeout=2,
-            )
-            if response.status_code == status.HTTP_200_OK:
-                return True
-        except requests.exceptions.RequestException:
-            pass
-        time.sleep(2)
+    timeout_in_seconds = duration.total_seconds()
+    start_time = time.monotonic()
+    delay = 0.1
     
-    return False
+    while True:
+        # Probe the port with a bare TCP connect; only once it accepts is
+        # a single HTTP /ping sent to confirm the app is serving
+        if _tcp_ready(OAUTH2_CALLBACK_SERVER_PORT, 0.2) and _ping_ok():
+            return True
+        
+        remaining = timeout_in_seconds - (time.monotonic() - start_time)
+        if remaining <= 0:
+            return False
+        # Exponential backoff with jitter, capped at 1s between probes
+        time.sleep(min(delay * random.uniform(0.5, 1.0), remaining))
+        delay = min(delay * 2, 1.0)
 
 def main():
     parser = argparse.ArgumentParser(description="OAuth2 Callback Server")
@@ -124,10 +166,14 @@ def main():
     args = parser.parse_args()
     
     oauth2_callback_server = OAuth2CallbackServer(region=args.region)
+    # Single process on purpose: the user token identifier lives in this
+    # server's memory. uvicorn picks uvloop and httptools when installed
+    # (uvicorn[standard]); per-request access logging is turned off.
     uvicorn.run(
         oauth2_callback_server.get_app(),
         host="127.0.0.1",
         port=OAUTH2_CALLBACK_SERVER_PORT,
+        access_log=False,
     )
 
 if __name__ == "__main__":
@@ -8,11 +8,16 @@ import os
 import json
 import asyncio
 import io
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict, Any, Optional, AsyncGenerator
+from typing import Dict, Any, List, Optional, AsyncGenerator
 
 from strands import Agent, tool
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from bedrock_agentcore.runtime import BedrockAgentCoreApp, RequestContext
 from bedrock_agentcore.identity.auth import requires_access_token
 from oauth2_callback_server import get_oauth2_callback_url
 
@@ -28,8 +33,90 @@ os.environ["OTEL_PYTHON_EXCLUDED_URLS"] = "/ping,/invocations"
 # Google Drive API scope
 SCOPES = ["https://www.googleapis.com/auth/drive.file"]
 
-# Global variable to store access token
-google_access_token: Optional[str] = None
+# Itineraries larger than this are uploaded in resumable chunks of this size
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Drive errors that are safe to retry (Google recommends exponential backoff)
+_RETRIABLE_STATUSES = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+# Drive access token of the invocation being handled; set per agent task so
+# concurrent invocations never see each other's token
+_TOKEN: ContextVar[Optional[str]] = ContextVar("drive_token", default=None)
+
+# Drive access tokens by runtime session id, so a session authorizes once and
+# later invocations of the same session reuse its token
+_SESSION_TOKENS: Dict[Optional[str], str] = {}
+_SESSION_TOKENS_LOCK = threading.Lock()
+
+# Tool result returned while no Drive token is available (encoded once)
+_AUTH_REQUIRED_RESPONSE = json.dumps({
+    "message": "Google Drive authentication is required. Please wait while we set up the authorization.",
+    "success": False
+})
+
+# Drive clients per worker thread: each client owns an httplib2.Http, which is
+# not thread-safe, and tools from one model turn run on different threads
+_DRIVE_LOCAL = threading.local()
+
+def _drive_service(token: str):
+    """Return this thread's Drive v3 client for the token, building it when the token changes"""
+    cached = getattr(_DRIVE_LOCAL, "service", None)
+    if cached is None or cached[0] != token:
+        creds = Credentials(token=token, scopes=SCOPES)
+        service = build('drive', 'v3', credentials=creds, cache_discovery=False, static_discovery=True)
+        cached = _DRIVE_LOCAL.service = (token, service)
+    return cached[1]
+
+def _is_retriable(error: HttpError) -> bool:
+    """Rate limits and server errors are worth retrying; other 4xx are not"""
+    status = error.resp.status
+    if status == 403:
+        return any(reason in str(error) for reason in _RATE_LIMIT_REASONS)
+    return status in _RETRIABLE_STATUSES
+
+def _with_backoff(call, max_attempts: int = 6, base: float = 0.5, cap: float = 32.0):
+    """Run a Drive API call, retrying transient errors with exponential backoff and jitter"""
+    for attempt in range(max_attempts):
+        try:
+            return call()
+        except HttpError as error:
+            if attempt == max_attempts - 1 or not _is_retriable(error):
+                raise
+            time.sleep(min(cap, base * 2 ** attempt) + random.random() * 0.25)
+
+def _upload_itinerary(service, destination: str, itinerary_content: str) -> Dict[str, Any]:
+    """Upload one itinerary as a text file and return its id, name and view link"""
+    # Create filename
+    filename = f"{destination.lower().replace(' ', '_')}_itinerary_{datetime.now().strftime('%Y%m%d')}.txt"
+    
+    # Create file metadata
+    file_metadata = {'name': filename}
+    
+    # Create media upload; large itineraries go up in resumable chunks so a
+    # failed chunk is retried on its own instead of re-sending the whole file
+    content = itinerary_content.encode('utf-8')
+    resumable = len(content) > UPLOAD_CHUNK_SIZE
+    media = MediaIoBaseUpload(
+        io.BytesIO(content),
+        mimetype='text/plain',
+        chunksize=UPLOAD_CHUNK_SIZE,
+        resumable=resumable
+    )
+    
+    # Upload file; requesting webViewLink here avoids a follow-up files().get()
+    request = service.files().create(
+        body=file_metadata,
+        media_body=media,
+        fields='id,name,webViewLink'
+    )
+    if not resumable:
+        return _with_backoff(request.execute)
+    
+    response = None
+    while response is None:
+        _, response = _with_backoff(request.next_chunk)
+    return response
 
 @tool(
     name="save_itinerary_to_drive",
@@ -46,37 +133,14 @@ def save_itinerary_to_drive(destination: str, itinerary_content: str) -> str:
     Returns:
         str: Success message with file link or error message
     """
-    global google_access_token
+    token = _TOKEN.get()
     
-    if not google_access_token:
-        return json.dumps({
-            "message": "Google Drive authentication is required. Please wait while we set up the authorization.",
-            "success": False
-        })
+    if not token:
+        return _AUTH_REQUIRED_RESPONSE
     
     try:
-        # Create credentials from access token
-        creds = Credentials(token=google_access_token, scopes=SCOPES)
-        service = build('drive', 'v3', credentials=creds)
-        
-        # Create filename
-        filename = f"{destination.lower().replace(' ', '_')}_itinerary_{datetime.now().strftime('%Y%m%d')}.txt"
-        
-        # Create file metadata
-        file_metadata = {'name': filename}
-        
-        # Create media upload
-        media = MediaIoBaseUpload(
-            io.BytesIO(itinerary_content.encode('utf-8')),
-            mimetype='text/plain'
-        )
-        
-        # Upload file
-        file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id,name,webViewLink'
-        ).execute()
+        service = _drive_service(token)
+        file = _upload_itinerary(service, destination, itinerary_content)
         
         return json.dumps({
             "success": True,
@@ -96,10 +160,62 @@ def save_itinerary_to_drive(destination: str, itinerary_content: str) -> str:
             "error": f"Error saving to Google Drive: {str(e)}"
         })
 
+@tool(
+    name="save_itineraries_to_drive",
+    description="Saves several travel documents (e.g. day-by-day plans, packing lists) to Google Drive in one call"
+)
+def save_itineraries_to_drive(itineraries: List[Dict[str, str]]) -> str:
+    """
+    Save multiple travel documents to Google Drive.
+    
+    Args:
+        itineraries: List of {"destination": ..., "itinerary_content": ...} items
+    
+    Returns:
+        str: Saved file names and links, plus any items that failed
+    """
+    token = _TOKEN.get()
+    
+    if not token:
+        return _AUTH_REQUIRED_RESPONSE
+    
+    # One service (and one kept-alive connection) for all uploads. Each item is
+    # reported on its own, so after a partial failure the agent retries only
+    # the failed items instead of re-creating files that were already saved.
+    try:
+        service = _drive_service(token)
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Error saving to Google Drive: {str(e)}"
+        })
+    
+    saved, failed = [], []
+    for item in itineraries:
+        destination = item.get("destination")
+        try:
+            f = _upload_itinerary(service, destination, item["itinerary_content"])
+            saved.append({"destination": destination, "name": f.get('name'), "file_id": f.get('id'), "view_link": f.get('webViewLink')})
+        except HttpError as error:
+            failed.append({"destination": destination, "error": f"Google Drive API error: {str(error)}"})
+        except Exception as e:
+            failed.append({"destination": destination, "error": f"Error saving to Google Drive: {str(e)}"})
+    
+    if failed:
+        message = f"⚠️ Saved {len(saved)} of {len(itineraries)} files to Google Drive; retry only the failed items"
+    else:
+        message = f"✅ Saved {len(saved)} files to Google Drive"
+    return json.dumps({
+        "success": not failed,
+        "message": message,
+        "files": saved,
+        "failed": failed
+    })
+
 # Initialize the agent
 agent = Agent(
     model="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-    tools=[save_itinerary_to_drive],
+    tools=[save_itinerary_to_drive, save_itineraries_to_drive],
     system_prompt="""
 You are a helpful travel planning assistant with the ability to save itineraries to Google Drive.
 When users ask you to create travel plans, generate detailed itineraries and offer to save them to Google Drive.
@@ -110,70 +226,71 @@ Always format itineraries clearly with day-by-day breakdowns, times, and activit
 # Initialize app
 app = BedrockAgentCoreApp()
 
-class StreamingQueue:
-    def __init__(self):
-        self.finished = False
-        self.queue = asyncio.Queue()
-        
-    async def put(self, item: str) -> None:
-        await self.queue.put(item)
+# Phrases in an agent response that indicate Drive authentication is needed,
+# matched case-insensitively in a single pass
+AUTH_KEYWORDS = [
+    "authentication", "authorize", "authorization", "auth", 
+    "sign in", "login", "access", "permission", "credential",
+    "need authentication", "requires authentication"
+]
+# Keywords that contain a shorter keyword (e.g. "authorization" contains "auth")
+# can never change whether the text matches, so they are left out of the pattern
+_AUTH_TERMS = [
+    k for k in AUTH_KEYWORDS
+    if not any(other != k and other.lower() in k.lower() for other in AUTH_KEYWORDS)
+]
+_AUTH_PATTERN = re.compile("|".join(map(re.escape, _AUTH_TERMS)), re.IGNORECASE)
 
-    async def finish(self) -> None:
-        self.finished = True
-        await self.queue.put(None)
+# Marks the end of an invocation's output stream
+_SENTINEL = object()
 
-    async def stream(self) -> AsyncGenerator[str, None]:
-        while True:
-            item = await self.queue.get()
-            if item is None and self.finished:
-                break
-            yield item
-
-queue = StreamingQueue()
+# Output queue of the invocation being handled; each agent task sets its own
+_output_queue: ContextVar[asyncio.Queue] = ContextVar("output_queue")
 
 async def on_auth_url(url: str) -> None:
     """Handle authorization URL callback."""
     print(f"Authorization url: {url}")
-    await queue.put(f"Authorization url: {url}")
+    await _output_queue.get().put(f"Authorization url: {url}")
 
-async def agent_task(user_message: str) -> None:
+async def agent_task(queue: asyncio.Queue, user_message: str, session_id: Optional[str]) -> None:
     """Execute the agent task with authentication handling."""
+    _output_queue.set(queue)
+    with _SESSION_TOKENS_LOCK:
+        _TOKEN.set(_SESSION_TOKENS.get(session_id))
     try:
         await queue.put("Begin agent execution")
         
         # Call the agent first to see if it needs authentication
-        response = agent(user_message)
+        response = await agent.invoke_async(user_message)
         
         # Extract text content from the response structure
         response_text = ""
         if isinstance(response.message, dict):
             content = response.message.get('content', [])
             if isinstance(content, list):
-                for item in content:
-                    if isinstance(item, dict) and 'text' in item:
-                        response_text += item['text']
+                response_text = "".join(
+                    item['text'] for item in content
+                    if isinstance(item, dict) and 'text' in item
+                )
         else:
             response_text = str(response.message)
         
         # Check if the response indicates authentication is required
-        auth_keywords = [
-            "authentication", "authorize", "authorization", "auth", 
-            "sign in", "login", "access", "permission", "credential",
-            "need authentication", "requires authentication"
-        ]
-        needs_auth = any(keyword.lower() in response_text.lower() for keyword in auth_keywords)
+        needs_auth = _AUTH_PATTERN.search(response_text) is not None
        
         if needs_auth:
             await queue.put("Authentication required for Google Drive access. Starting authorization flow...")
             
             # Trigger the 3LO authentication flow
             try:
-                global google_access_token
-                google_access_token = await get_google_drive_token(access_token='')
+                token = await get_google_drive_token(access_token='')
+                _TOKEN.set(token)
+                with _SESSION_TOKENS_LOCK:
+                    _SESSION_TOKENS[session_id] = token
                 await queue.put("Authentication successful! Retrying your request...")
                 
                 # Retry the agent call now that we have authentication
-                response = agent(user_message)
+                response = await agent.invoke_async(user_message)
             except Exception as auth_error:
                 print(f"auth_error: {auth_error}")
                 await queue.put(f"Authentication failed: {str(auth_error)}")
@@ -183,7 +300,7 @@ async def agent_task(user_message: str) -> None:
     except Exception as e:
         await queue.put(f"Error: {str(e)}")
     finally:
-        await queue.finish()
+        await queue.put(_SENTINEL)
 
 @requires_access_token(
     provider_name="google-drive-provider",
@@ -195,24 +312,27 @@ async def agent_task(user_message: str) -> None:
 )
 async def get_google_drive_token(*, access_token: str) -> str:
     """Get Google Drive access token."""
-    global google_access_token
-    google_access_token = access_token
+    _TOKEN.set(access_token)
     return access_token
 
 @app.entrypoint
-async def agent_invocation(payload: Dict[str, Any]) -> AsyncGenerator[str, None]:
+async def agent_invocation(payload: Dict[str, Any], context: RequestContext) -> AsyncGenerator[str, None]:
     """Main entrypoint for agent invocations."""
     user_message = payload.get(
         "prompt", 
         "Hello! I'm your travel planning assistant. How can I help you plan your next trip?"
     )
     
-    # Create and start the agent task
-    task = asyncio.create_task(agent_task(user_message))
+    # Create and start the agent task with a queue owned by this invocation
+    queue = asyncio.Queue()
+    task = asyncio.create_task(agent_task(queue, user_message, context.session_id))
     
     # Stream results
     async def stream_with_task() -> AsyncGenerator[str, None]:
-        async for item in queue.stream():
+        while True:
+            item = await queue.get()
+            if item is _SENTINEL:
+                break
             yield item
         await task
     
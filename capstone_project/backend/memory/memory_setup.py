@@ -5,6 +5,7 @@ Creates Memory resource with travel-specific strategies
 
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from botocore.exceptions import ClientError
 from bedrock_agentcore.memory import MemoryClient
@@ -82,33 +83,45 @@ def get_namespaces(client: MemoryClient, memory_id: str):
     strategies = client.get_memory_strategies(memory_id)
     return {i["type"]: i["namespaces"][0] for i in strategies}
 
+# Sample travel interactions to establish preferences (shared by every seeded user)
+_TRAVEL_INTERACTIONS = (
+    ("I prefer mid-range hotels, nothing too fancy but clean and comfortable.", "USER"),
+    ("Noted! I'll focus on 3-4 star hotels with good reviews for cleanliness and comfort.", "ASSISTANT"),
+    ("I'm vegetarian, so I need restaurants with good vegetarian options.", "USER"),
+    ("Perfect! I'll make sure to recommend destinations and restaurants known for excellent vegetarian cuisine.", "ASSISTANT"),
+    ("My budget is usually around $3000-5000 for a 10-day international trip.", "USER"),
+    ("That's a great budget range! I can help you plan amazing trips within $3000-5000 for 10 days.", "ASSISTANT"),
+    ("I love historical sites and museums, not so much into nightlife or beaches.", "USER"),
+    ("Excellent! I'll focus on destinations rich in history and culture with world-class museums.", "ASSISTANT")
+)
+
+# Upper bound on concurrent create_event calls when seeding many users
+SEED_CONCURRENCY = 16
+
 def seed_travel_preferences(client: MemoryClient, memory_id: str, user_id: str):
     """Seed initial travel preferences for demonstration"""
     
-    # Sample travel interactions to establish preferences
-    travel_interactions = [
-        ("I prefer mid-range hotels, nothing too fancy but clean and comfortable.", "USER"),
-        ("Noted! I'll focus on 3-4 star hotels with good reviews for cleanliness and comfort.", "ASSISTANT"),
-        ("I'm vegetarian, so I need restaurants with good vegetarian options.", "USER"),
-        ("Perfect! I'll make sure to recommend destinations and restaurants known for excellent vegetarian cuisine.", "ASSISTANT"),
-        ("My budget is usually around $3000-5000 for a 10-day international trip.", "USER"),
-        ("That's a great budget range! I can help you plan amazing trips within $3000-5000 for 10 days.", "ASSISTANT"),
-        ("I love historical sites and museums, not so much into nightlife or beaches.", "USER"),
-        ("Excellent! I'll focus on destinations rich in history and culture with world-class museums.", "ASSISTANT")
-    ]
-    
     try:
         client.create_event(
             memory_id=memory_id,
             actor_id=user_id,
             session_id="preference_setup",
-            messages=travel_interactions
+            messages=_TRAVEL_INTERACTIONS
         )
         print(f"✅ Seeded travel preferences for user: {user_id}")
         
     except Exception as e:
         print(f"⚠️ Error seeding preferences: {e}")
 
+def seed_many(client: MemoryClient, memory_id: str, user_ids: list[str]):
+    """Seed travel preferences for many users concurrently
+    
+    MemoryClient is synchronous, so the create_event calls fan out over a
+    thread pool whose size caps the request rate against the Memory API.
+    """
+    with ThreadPoolExecutor(max_workers=SEED_CONCURRENCY) as executor:
+        list(executor.map(lambda user_id: seed_travel_preferences(client, memory_id, user_id), user_ids))
+
 if __name__ == "__main__":
     # Create memory resource
     memory_id, client = create_travel_memory()
@@ -133,7 +146,7 @@ if __name__ == "__main__":
     }
     
     with open('memory_info.json', 'w') as f:
-        json.dump(memory_info, f, indent=2)
+        f.write(json.dumps(memory_info, indent=2))
     
     print(f"\n💾 Memory information saved to memory_info.json")
     print(f"Memory ID: {memory_id}")
@@ -5,9 +5,40 @@ Retrieves API keys and credentials from AWS Secrets Manager via credential provi
 """
 
 import json
+import logging
 import boto3
+from functools import lru_cache
+from threading import Lock
 from typing import Optional, Dict, Any
 
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Resolved API keys keyed by (region, provider prefix); secrets rarely rotate,
+# so a 15 minute TTL keeps tool calls off the AWS APIs on the hot path
+_API_KEY_CACHE = TTLCache(maxsize=64, ttl=900)
+_API_KEY_CACHE_LOCK = Lock()
+
+# Full provider names keyed by (region, provider prefix), so refreshing an
+# expired key goes straight to the provider instead of re-listing them all
+_PROVIDER_NAME_CACHE = TTLCache(maxsize=64, ttl=3600)
+
+# Credential provider name prefix of the ExchangeRate-API key
+EXCHANGERATE_PROVIDER_PREFIX = 'ExchangeRate-ApiKey'
+
+
+@lru_cache(maxsize=8)
+def _agentcore_client(region: str):
+    """Shared bedrock-agentcore-control client per region"""
+    return boto3.client('bedrock-agentcore-control', region_name=region)
+
+
+@lru_cache(maxsize=8)
+def _secrets_client(region: str):
+    """Shared Secrets Manager client per region"""
+    return boto3.client('secretsmanager', region_name=region)
+
 
 class IdentityHelper:
     """Helper class for managing AgentCore identity and credential providers"""
@@ -19,8 +50,8 @@ class IdentityHelper:
             region: AWS region for API calls
         """
         self.region = region
-        self.agentcore_client = boto3.client('bedrock-agentcore-control', region_name=region)
-        self.secrets_client = boto3.client('secretsmanager', region_name=region)
+        self.agentcore_client = _agentcore_client(region)
+        self.secrets_client = _secrets_client(region)
     
     def get_api_key_by_provider_name(self, provider_name_prefix: str) -> Optional[str]:
         """Retrieve API key from credential provider by name prefix
@@ -31,55 +62,99 @@ class IdentityHelper:
         Returns:
             API key string or None if not found
         """
+        cache_key = (self.region, provider_name_prefix)
+        with _API_KEY_CACHE_LOCK:
+            api_key = _API_KEY_CACHE.get(cache_key)
+        if api_key:
+            return api_key
+        
         try:
-            # Step 1: List all credential providers
-            print(f"🔍 Searching for credential provider: {provider_name_prefix}...")
-            response = self.agentcore_client.list_api_key_credential_providers(maxResults=100)
+            # Step 1: Find the provider matching the prefix
+            provider_name = self._resolve_provider_name(provider_name_prefix)
             
-            providers = response.get('credentialProviders', [])
-            target_provider = None
-            
-            # Find the provider matching the prefix
-            for provider in providers:
-                if provider['name'].startswith(provider_name_prefix):
-                    target_provider = provider
-                    break
-            
-            if not target_provider:
-                print(f"❌ Credential provider not found: {provider_name_prefix}")
+            if not provider_name:
+                logger.warning("Credential provider not found: %s", provider_name_prefix)
                 return None
             
-            provider_name = target_provider['name']
-            print(f"✅ Found provider: {provider_name}")
+            logger.debug("Found provider: %s", provider_name)
             
             # Step 2: Get credential provider details
-            provider_response = self.agentcore_client.get_api_key_credential_provider(
-                name=provider_name
-            )
-            print(f"   ARN: {provider_response['credentialProviderArn']}")
+            try:
+                provider_response = self.agentcore_client.get_api_key_credential_provider(
+                    name=provider_name
+                )
+            except Exception:
+                # The provider may have been recreated under a new name
+                with _API_KEY_CACHE_LOCK:
+                    _PROVIDER_NAME_CACHE.pop(cache_key, None)
+                raise
+            logger.debug("Provider ARN: %s", provider_response['credentialProviderArn'])
             
             # Step 3: Extract secret ARN
             secret_arn = provider_response['apiKeySecretArn']['secretArn']
-            print(f"   Secret ARN: {secret_arn}")
+            logger.debug("Secret ARN: %s", secret_arn)
             
             # Step 4: Retrieve API key from Secrets Manager
-            print(f"🔐 Retrieving API key from Secrets Manager...")
+            logger.debug("Retrieving API key from Secrets Manager")
             secret_response = self.secrets_client.get_secret_value(SecretId=secret_arn)
             
             # Parse secret value
             api_key = self._parse_secret_value(secret_response)
             
             if api_key:
-                print(f"✅ Successfully retrieved API key")
+                logger.info("Retrieved API key from provider %s", provider_name)
+                with _API_KEY_CACHE_LOCK:
+                    _API_KEY_CACHE[cache_key] = api_key
                 return api_key
             else:
-                print(f"❌ Failed to parse API key from secret")
+                logger.warning("Failed to parse API key from secret %s", secret_arn)
                 return None
                 
         except Exception as e:
-            print(f"❌ Error retrieving API key: {e}")
+            logger.error("Error retrieving API key: %s", e)
             return None
     
+    def _resolve_provider_name(self, provider_name_prefix: str) -> Optional[str]:
+        """Return the full name of the first provider matching a prefix
+        
+        Args:
+            provider_name_prefix: Prefix to search for
+        
+        Returns:
+            Provider name or None if no provider matches
+        """
+        cache_key = (self.region, provider_name_prefix)
+        with _API_KEY_CACHE_LOCK:
+            provider_name = _PROVIDER_NAME_CACHE.get(cache_key)
+        if provider_name:
+            return provider_name
+        
+        # The list API has no name filter, so scan page by page and stop at the first match
+        logger.debug("Searching for credential provider: %s", provider_name_prefix)
+        provider_name = next(
+            (name for name in self.iter_credential_providers() if name.startswith(provider_name_prefix)),
+            None
+        )
+        if provider_name:
+            with _API_KEY_CACHE_LOCK:
+                _PROVIDER_NAME_CACHE[cache_key] = provider_name
+        return provider_name
+    
+    def _iter_api_key_providers(self):
+        """Yield API key credential providers across all result pages
+        
+        Pages are fetched lazily, so callers that stop early skip the rest.
+        """
+        kwargs = {'maxResults': 100}
+        while True:
+            response = self.agentcore_client.list_api_key_credential_providers(**kwargs)
+            yield from response.get('credentialProviders', [])
+            
+            next_token = response.get('nextToken')
+            if not next_token:
+                return
+            kwargs['nextToken'] = next_token
+    
     def _parse_secret_value(self, secret_response: Dict[str, Any]) -> Optional[str]:
         """Parse secret value from Secrets Manager response
         
@@ -92,7 +167,10 @@ class IdentityHelper:
         if 'SecretString' in secret_response:
             secret_value = secret_response['SecretString']
             
-            # Try to parse as JSON first
+            # Plain API keys are the common case; only JSON objects need parsing
+            if not secret_value.lstrip().startswith('{'):
+                return secret_value
+            
             try:
                 secret_json = json.loads(secret_value)
                 
@@ -110,7 +188,7 @@ class IdentityHelper:
                 # If no standard field found, return the whole JSON as string
                 return secret_value
                 
-            except json.JSONDecodeError:
+            except ValueError:
                 # Not JSON, return as raw string
                 return secret_value
         
@@ -126,7 +204,29 @@ class IdentityHelper:
         Returns:
             ExchangeRate API key or None if not found
         """
-        return self.get_api_key_by_provider_name('ExchangeRate-ApiKey')
+        return self.get_api_key_by_provider_name(EXCHANGERATE_PROVIDER_PREFIX)
+    
+    def invalidate_exchangerate_api_key(self) -> None:
+        """Drop the cached ExchangeRate API key, e.g. after the API rejected it"""
+        self.invalidate_api_key(EXCHANGERATE_PROVIDER_PREFIX)
+    
+    def invalidate_api_key(self, provider_name_prefix: str) -> None:
+        """Drop a cached API key so the next lookup reads the secret again
+        
+        Args:
+            provider_name_prefix: Prefix the key was retrieved with
+        """
+        with _API_KEY_CACHE_LOCK:
+            _API_KEY_CACHE.pop((self.region, provider_name_prefix), None)
+    
+    def iter_credential_providers(self):
+        """Yield credential provider names across all result pages
+        
+        Yields:
+            Credential provider names, fetched one page at a time
+        """
+        for provider in self._iter_api_key_providers():
+            yield provider['name']
     
     def list_all_credential_providers(self) -> list:
         """List all available credential providers
@@ -134,14 +234,13 @@ class IdentityHelper:
         Returns:
             List of credential provider names
         """
+        provider_names = []
         try:
-            response = self.agentcore_client.list_api_key_credential_providers(maxResults=100)
-            providers = response.get('credentialProviders', [])
-            
-            provider_names = [p['name'] for p in providers]
-            print(f"📋 Available credential providers ({len(provider_names)}):")
-            for name in provider_names:
+            print("📋 Available credential providers:")
+            for name in self.iter_credential_providers():
                 print(f"  • {name}")
+                provider_names.append(name)
+            print(f"   ({len(provider_names)} total)")
             
             return provider_names
             
@@ -151,6 +250,12 @@ class IdentityHelper:
 
 
 # Convenience functions for direct usage
+@lru_cache(maxsize=8)
+def _helper(region: str) -> IdentityHelper:
+    """Shared IdentityHelper per region for the convenience functions"""
+    return IdentityHelper(region=region)
+
+
 def get_exchangerate_api_key(region: str = "us-east-1") -> Optional[str]:
     """Get ExchangeRate API key from credential provider
     
@@ -160,8 +265,7 @@ def get_exchangerate_api_key(region: str = "us-east-1") -> Optional[str]:
     Returns:
         API key string or None
     """
-    helper = IdentityHelper(region=region)
-    return helper.get_exchangerate_api_key()
+    return _helper(region).get_exchangerate_api_key()
 
 
 def get_api_key(provider_prefix: str, region: str = "us-east-1") -> Optional[str]:
@@ -174,11 +278,12 @@ def get_api_key(provider_prefix: str, region: str = "us-east-1") -> Optional[str
     Returns:
         API key string or None
     """
-    helper = IdentityHelper(region=region)
-    return helper.get_api_key_by_provider_name(provider_prefix)
+    return _helper(region).get_api_key_by_provider_name(provider_prefix)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    
     # Example usage
     helper = IdentityHelper()
     
@@ -7,15 +7,25 @@ Uses environment variables for configuration (set during runtime deployment)
 
 import os
 import json
+import queue
+import atexit
+import threading
+import functools
+import time
+import asyncio
+import contextvars
 import requests
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, Union
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import TTLCache
 
 from strands import Agent, tool
 from strands.models import BedrockModel
-from strands_tools.code_interpreter import AgentCoreCodeInterpreter
-from strands_tools.browser import AgentCoreBrowser
+from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from bedrock_agentcore.memory import MemoryClient
 from identity_helper import IdentityHelper
 
 # Configuration from environment variables
@@ -30,47 +40,125 @@ GATEWAY_OAUTH_CLIENT_ID = os.environ.get("GATEWAY_OAUTH_CLIENT_ID")
 GATEWAY_OAUTH_CLIENT_SECRET = os.environ.get("GATEWAY_OAUTH_CLIENT_SECRET")
 GATEWAY_OAUTH_SCOPE = os.environ.get("GATEWAY_OAUTH_SCOPE")
 
+# Gateway settings are fixed for the container's lifetime, so check them once
+_GATEWAY_READY = all([
+    GATEWAY_MCP_ENDPOINT,
+    GATEWAY_TOKEN_ENDPOINT,
+    GATEWAY_OAUTH_CLIENT_ID,
+    GATEWAY_OAUTH_CLIENT_SECRET
+])
+_GATEWAY_ERR = json.dumps({"error": "Gateway not configured"})
+
 # Memory configuration from environment
 MEMORY_ID = os.environ.get("MEMORY_ID")
 MEMORY_USER_ID = os.environ.get("MEMORY_USER_ID", "default-user")
 MEMORY_SESSION_ID = os.environ.get("MEMORY_SESSION_ID", "default-session")
+# Each user preference is stored as its own record, so retrieve enough of them
+PREFERENCES_TOP_K = int(os.environ.get("PREFERENCES_TOP_K", "5"))
+
+# Run the independent tool calls of a model turn concurrently (set to "false"
+# to fall back to one-at-a-time execution)
+PARALLEL_TOOLS = os.environ.get("PARALLEL_TOOLS", "true").lower() == "true"
+
+# Bedrock model settings: connection pool size for concurrent invocations, and
+# opt-in latency-optimized inference (higher per-token price, and only offered
+# for some models and regions)
+BEDROCK_MAX_PARALLEL = int(os.environ.get("BEDROCK_MAX_PARALLEL", "50"))
+LATENCY_OPTIMIZED = os.environ.get("LATENCY_OPTIMIZED", "false").lower() == "true"
+
+# Tool clients are created on first use, so cold starts don't pay for
+# boto3 clients that a given request never touches. strands_tools and the
+# memory client are imported there too, as they are slow to import.
+@functools.cache
+def _code_interpreter():
+    from strands_tools.code_interpreter import AgentCoreCodeInterpreter
+    return AgentCoreCodeInterpreter(region=REGION)
+
+@functools.cache
+def _browser_tool():
+    from strands_tools.browser import AgentCoreBrowser
+    return AgentCoreBrowser(region=REGION)
+
+@functools.cache
+def _memory_client():
+    if not MEMORY_ID:
+        return None
+    from bedrock_agentcore.memory import MemoryClient
+    return MemoryClient(region_name=REGION)
+
+@functools.cache
+def _identity_helper():
+    return IdentityHelper(region=REGION)
+
+# Shared session so token and MCP calls reuse kept-alive TLS connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset({"POST"})  # token requests and read-only tool lookups
+    )
+))
+
+# Request pieces that are the same for every gateway call, built once
+_TOKEN_DATA = {
+    "grant_type": "client_credentials",
+    "client_id": GATEWAY_OAUTH_CLIENT_ID,
+    "client_secret": GATEWAY_OAUTH_CLIENT_SECRET,
+    "scope": GATEWAY_OAUTH_SCOPE
+}
+_MCP_HEADERS = {"Content-Type": "application/json"}
+
+# Gateway OAuth token reused until shortly before it expires
+_TOKEN_CACHE = {"token": None, "exp": 0.0}
+_TOKEN_LOCK = threading.Lock()
+_TOKEN_EXPIRY_MARGIN = 30  # seconds
+
+# (connect, read) timeouts in seconds; the token request runs under _TOKEN_LOCK,
+# so it must never hang and stall every tool thread waiting on the lock
+_TOKEN_TIMEOUT = (3, 10)
+_MCP_TIMEOUT = (3, 30)
 
-# Initialize tools
-code_interpreter = AgentCoreCodeInterpreter(region=REGION)
-browser_tool = AgentCoreBrowser(region=REGION)
-memory_client = MemoryClient(region_name=REGION) if MEMORY_ID else None
-identity_helper = IdentityHelper(region=REGION)
+def _get_token():
+    """Return a cached gateway access token, fetching a new one when expired"""
+    with _TOKEN_LOCK:
+        if _TOKEN_CACHE["token"] and time.monotonic() < _TOKEN_CACHE["exp"]:
+            return _TOKEN_CACHE["token"]
+        
+        token_response = _SESSION.post(
+            GATEWAY_TOKEN_ENDPOINT,
+            data=_TOKEN_DATA,
+            timeout=_TOKEN_TIMEOUT
+        )
+        
+        if token_response.status_code != 200:
+            return None
+        
+        token_data = token_response.json()
+        _TOKEN_CACHE["token"] = token_data.get("access_token")
+        _TOKEN_CACHE["exp"] = time.monotonic() + token_data.get("expires_in", 3600) - _TOKEN_EXPIRY_MARGIN
+        return _TOKEN_CACHE["token"]
 
 def _call_mcp_tool(tool_name: str, arguments: dict) -> str:
     """Internal helper to call MCP gateway tools"""
-    if not GATEWAY_MCP_ENDPOINT:
-        return json.dumps({"error": "Gateway not configured"})
+    if not _GATEWAY_READY:
+        return _GATEWAY_ERR
     
     try:
-        # Get access token
-        token_response = requests.post(
-            GATEWAY_TOKEN_ENDPOINT,
-            data={
-                "grant_type": "client_credentials",
-                "client_id": GATEWAY_OAUTH_CLIENT_ID,
-                "client_secret": GATEWAY_OAUTH_CLIENT_SECRET,
-                "scope": GATEWAY_OAUTH_SCOPE
-            }
-        )
+        # Get access token (cached until shortly before expiry)
+        access_token = _get_token()
         
-        if token_response.status_code != 200:
+        if not access_token:
             return json.dumps({"error": "Authentication failed"})
         
-        access_token = token_response.json().get("access_token")
-        
         # Call MCP endpoint
-        response = requests.post(
+        response = _SESSION.post(
             GATEWAY_MCP_ENDPOINT,
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            },
-            json={
+            headers={**_MCP_HEADERS, "Authorization": f"Bearer {access_token}"},
+            data=json.dumps({
                 "jsonrpc": "2.0",
                 "id": f"unified-{tool_name}",
                 "method": "tools/call",
@@ -78,129 +166,248 @@ def _call_mcp_tool(tool_name: str, arguments: dict) -> str:
                     "name": tool_name,
                     "arguments": arguments
                 }
-            }
+            }, separators=(",", ":")),
+            timeout=_MCP_TIMEOUT
         )
         
         if response.status_code == 200:
             result = response.json()
-            return json.dumps(result.get("result", {}))
+            if "error" in result or "result" not in result:
+                # JSON-RPC level failure; report it so it is never cached as a result
+                return json.dumps({"error": f"Gateway error: {result.get('error', 'missing result')}"})
+            return json.dumps(result["result"])
         else:
+            if response.status_code == 401:
+                # Token was revoked or expired early; fetch a fresh one next call
+                with _TOKEN_LOCK:
+                    _TOKEN_CACHE["token"] = None
             return json.dumps({"error": f"API call failed: {response.status_code}"})
             
     except Exception as e:
         return json.dumps({"error": f"Error calling gateway API: {str(e)}"})
 
+# Successful tool results keyed by normalized arguments, so repeated lookups
+# within a conversation skip the gateway round trip
+_FLIGHTS_CACHE = TTLCache(maxsize=512, ttl=600)
+_WEATHER_CACHE = TTLCache(maxsize=512, ttl=900)
+_CURRENCY_CACHE = TTLCache(maxsize=512, ttl=3600)
+_RESULT_CACHE_LOCK = threading.Lock()
+
+def _cached_call(cache: TTLCache, key: tuple, fn) -> str:
+    """Return a cached tool result, or call fn and cache the result unless it is an error or empty"""
+    with _RESULT_CACHE_LOCK:
+        result = cache.get(key)
+    if result is not None:
+        return result
+    
+    result = fn()
+    try:
+        parsed = json.loads(result)
+    except ValueError:
+        return result
+    if parsed and isinstance(parsed, dict) and "error" not in parsed and not parsed.get("isError"):
+        with _RESULT_CACHE_LOCK:
+            cache[key] = result
+    return result
+
+def _norm_city(location: str) -> str:
+    """Normalize 'rome, it ' style locations to 'Rome,IT'"""
+    city, *codes = (part.strip() for part in location.split(","))
+    return ",".join([city.title(), *(code.upper() for code in codes)])
+
+# Worker threads for the blocking gateway calls made by the async tools
+_TOOL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool")
+
+async def _cached_call_async(cache: TTLCache, key: tuple, fn) -> str:
+    """Run _cached_call on the tool pool so the event loop is not blocked
+    
+    The call runs in a copy of the current context (as asyncio.to_thread does),
+    so the trace context reaches the worker and its HTTP spans stay nested.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_TOOL_POOL, ctx.run, _cached_call, cache, key, fn)
+
 @tool
-def search_flights(origin: str, destination: str) -> str:
+async def search_flights(origin: str, destination: str) -> str:
     """Search for flights between two airports on a specific date
     
     Args:
         dep_iata: Filter by departure IATA code (e.g., SFO).
         arr_iata: Filter by arrival IATA code (e.g., DFW).
     """
-    return _call_mcp_tool(
-        "FlightSearch___getFlights",
-        {"dep_iata": origin, "arr_iata": destination}
+    origin, destination = origin.strip().upper(), destination.strip().upper()
+    return await _cached_call_async(
+        _FLIGHTS_CACHE,
+        (origin, destination),
+        lambda: _call_mcp_tool(
+            "FlightSearch___getFlights",
+            {"dep_iata": origin, "arr_iata": destination}
+        )
     )
 
 
 @tool
-def get_weather(location: str, units: str = "metric") -> str:
+async def get_weather(location: str, units: str = "metric") -> str:
     """Get current weather for a location
     
     Args:
         location: City name and country code (e.g., 'Rome,IT', 'Paris,FR', 'New York,US')
         units: Temperature units - 'metric' (Celsius) or 'imperial' (Fahrenheit)
     """
-    return _call_mcp_tool(
-        "WeatherSearch___getCurrentWeather",
-        {"q": location, "units": units}
+    location, units = _norm_city(location), units.strip().lower()
+    return await _cached_call_async(
+        _WEATHER_CACHE,
+        (location, units),
+        lambda: _call_mcp_tool(
+            "WeatherSearch___getCurrentWeather",
+            {"q": location, "units": units}
+        )
     )
 
+# ExchangeRate-API error types meaning the API key itself was rejected
+_FX_KEY_REJECTED = ("invalid-key", "inactive-account")
+
 @tool
-def convert_currency(from_currency: str, to_currency: str) -> str:
+async def convert_currency(from_currency: str, to_currency: str) -> str:
     """Get current exchange rate between two currencies
     
     Args:
         from_currency: Source currency code (e.g., 'USD', 'EUR', 'GBP')
         to_currency: Target currency code (e.g., 'EUR', 'USD', 'JPY')
     """
-    # Retrieve API key from credential provider
-    api_key = identity_helper.get_exchangerate_api_key()
+    from_currency, to_currency = from_currency.strip().upper(), to_currency.strip().upper()
     
-    if not api_key:
-        return json.dumps({"error": "ExchangeRate API key not available"})
+    def fetch_rate():
+        # Retrieve API key from credential provider
+        api_key = _identity_helper().get_exchangerate_api_key()
+        
+        if not api_key:
+            return json.dumps({"error": "ExchangeRate API key not available"})
+        
+        result = _call_mcp_tool(
+            "ExchangeRate___convertCurrency",
+            {
+                "api_key": api_key,
+                "from_currency": from_currency,
+                "to_currency": to_currency
+            }
+        )
+        if any(marker in result for marker in _FX_KEY_REJECTED):
+            # Key was rotated or revoked; read it from Secrets Manager next time,
+            # and report an error so this response is not cached
+            _identity_helper().invalidate_exchangerate_api_key()
+            return json.dumps({"error": "ExchangeRate API key was rejected; retry to use the current key"})
+        return result
     
-    return _call_mcp_tool(
-        "ExchangeRate___convertCurrency",
-        {
-            "api_key": api_key,
-            "from_currency": from_currency,
-            "to_currency": to_currency
-        }
-    )
+    return await _cached_call_async(_CURRENCY_CACHE, (from_currency, to_currency), fetch_rate)
+
+# Preferences namespace of the configured user, and recently retrieved
+# preferences (they rarely change within a session)
+_PREFERENCES_NAMESPACE = f"travel/user/{MEMORY_USER_ID}/preferences"
+_PREFERENCES_CACHE = TTLCache(maxsize=1024, ttl=60)
 
 @tool
 def get_user_preferences() -> str:
     """Retrieve user travel preferences from memory"""
-    if not memory_client or not MEMORY_ID:
+    memory_client = _memory_client()
+    if not memory_client:
         return "Memory not configured - missing MEMORY_ID environment variable"
     
+    with _RESULT_CACHE_LOCK:
+        cached = _PREFERENCES_CACHE.get(MEMORY_USER_ID)
+    if cached is not None:
+        return cached
+    
     try:
         memories = memory_client.retrieve_memories(
             memory_id=MEMORY_ID,
-            namespace=f"travel/user/{MEMORY_USER_ID}/preferences",
+            namespace=_PREFERENCES_NAMESPACE,
             query="travel preferences",
-            top_k=5
+            top_k=PREFERENCES_TOP_K
         )
         
-        preferences = []
-        for memory in memories:
-            if isinstance(memory, dict) and 'content' in memory:
-                content = memory['content']
-                if isinstance(content, dict) and 'text' in content:
-                    preferences.append(content['text'])
+        preferences = [
+            m["content"]["text"] for m in memories
+            if isinstance(m, dict) and isinstance(m.get("content"), dict) and "text" in m["content"]
+        ]
         
-        return json.dumps({
+        result = json.dumps({
             "preferences": preferences,
             "user_id": MEMORY_USER_ID
         })
+        with _RESULT_CACHE_LOCK:
+            _PREFERENCES_CACHE[MEMORY_USER_ID] = result
+        return result
         
     except Exception as e:
         return f"Error retrieving preferences: {str(e)}"
 
+# Memory writes are queued and sent by a background thread, so saving a
+# memory doesn't add a create_event round trip to the agent's response
+_MEMORY_QUEUE = queue.Queue(maxsize=1024)
+_MEMORY_BATCH_SIZE = 16
+_MEMORY_FLUSH_TIMEOUT = 10.0  # seconds to wait for queued writes at exit
+
+_MEMORY_STOP = object()  # queued at exit, after any pending memories
+
+def _memory_writer():
+    """Drain queued memories and write each batch as one event until stopped"""
+    stopping = False
+    while not stopping:
+        batch = []
+        item = _MEMORY_QUEUE.get()
+        while item is not _MEMORY_STOP:
+            batch.append(item)
+            if len(batch) >= _MEMORY_BATCH_SIZE:
+                break
+            try:
+                item = _MEMORY_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+        stopping = item is _MEMORY_STOP
+        if not batch:
+            continue
+        
+        try:
+            _memory_client().create_event(
+                memory_id=MEMORY_ID,
+                actor_id=MEMORY_USER_ID,
+                session_id=MEMORY_SESSION_ID,
+                messages=[(content, "ASSISTANT") for content in batch]
+            )
+        except Exception as e:
+            print(f"⚠️ Error saving memory: {e}")
+
+def _stop_memory_writer(writer):
+    """Stop the writer once queued memories are sent, waiting a bounded time"""
+    deadline = time.monotonic() + _MEMORY_FLUSH_TIMEOUT
+    try:
+        _MEMORY_QUEUE.put(_MEMORY_STOP, timeout=_MEMORY_FLUSH_TIMEOUT)
+    except queue.Full:
+        return
+    writer.join(max(0, deadline - time.monotonic()))
+
+@functools.cache
+def _start_memory_writer():
+    writer = threading.Thread(target=_memory_writer, name="memory-writer", daemon=True)
+    writer.start()
+    atexit.register(_stop_memory_writer, writer)
+
 @tool
 def save_travel_memory(content: str, memory_type: str = "semantic") -> str:
     """Save travel information to memory"""
-    if not memory_client or not MEMORY_ID:
+    if not _memory_client():
         return "Memory not configured - missing MEMORY_ID environment variable"
     
+    _start_memory_writer()
     try:
-        memory_client.create_event(
-            memory_id=MEMORY_ID,
-            actor_id=MEMORY_USER_ID,
-            session_id=MEMORY_SESSION_ID,
-            messages=[(content, "ASSISTANT")]
-        )
-        return "Memory saved successfully"
-    except Exception as e:
-        return f"Error saving memory: {str(e)}"
-
-# Create unified agent
-model = BedrockModel(model_id=MODEL_ID)
-
-unified_agent = Agent(
-    model=model,
-    tools=[
-        search_flights,
-        get_weather,
-        convert_currency,
-        get_user_preferences,
-        save_travel_memory,
-        #code_interpreter.code_interpreter,
-        #browser_tool.browser
-    ],
-    system_prompt="""
+        _MEMORY_QUEUE.put_nowait(content)
+        return "Memory save queued"
+    except queue.Full:
+        return "Error saving memory: write queue is full"
+
+SYSTEM_PROMPT = """
 You are a comprehensive AI Travel Companion with access to:
 
 1. **Flight Search**: search_flights(origin, destination) - Find flights between airports
@@ -213,29 +420,71 @@ Always:
 - Use real APIs for current flight, hotel, weather, and currency information
 - Provide comprehensive travel planning with budget considerations
 - Save important travel decisions to memory
+- When lookups are independent (e.g. weather in two cities, or flights plus weather plus
+  exchange rates), request all of those tool calls together in a single response
+  instead of one per turn
 
 Provide comprehensive, personalized travel planning assistance.
 """
-)
+
+# Create unified agent on the first request
+@functools.cache
+def _unified_agent():
+    return Agent(
+        model=BedrockModel(
+            model_id=MODEL_ID,
+            boto_client_config=Config(max_pool_connections=BEDROCK_MAX_PARALLEL),
+            **({"additional_args": {"performanceConfig": {"latency": "optimized"}}} if LATENCY_OPTIMIZED else {})
+        ),
+        tool_executor=ConcurrentToolExecutor() if PARALLEL_TOOLS else SequentialToolExecutor(),
+        tools=[
+            search_flights,
+            get_weather,
+            convert_currency,
+            get_user_preferences,
+            save_travel_memory,
+            #_code_interpreter().code_interpreter,
+            #_browser_tool().browser
+        ],
+        system_prompt=SYSTEM_PROMPT
+    )
 
 # Initialize AgentCore app
 app = BedrockAgentCoreApp()
 
+async def _stream_unified_agent(user_input: str) -> AsyncGenerator[str, None]:
+    """Yield response text chunks as the model generates them"""
+    try:
+        async for event in _unified_agent().stream_async(user_input):
+            if "data" in event:
+                yield event["data"]
+    except Exception as e:
+        yield f"Error processing request: {str(e)}"
+
 @app.entrypoint
-def invoke_unified_agent(payload: Dict[str, Any]) -> str:
-    """Unified agent entrypoint"""
+async def invoke_unified_agent(payload: Dict[str, Any]) -> Union[str, AsyncGenerator[str, None]]:
+    """Unified agent entrypoint
+    
+    Pass "stream": true in the payload to receive the response as a
+    text/event-stream of chunks instead of one string at the end.
+    """
     user_input = payload.get("prompt", "Hello! How can I help you plan your travel?")
     
+    if payload.get("stream"):
+        # The app serves a returned async generator as a streaming response;
+        # a client disconnect closes the generator and stops the agent stream
+        return _stream_unified_agent(user_input)
+    
     try:
-        response = unified_agent(user_input)
-        
-        # Extract response text
-        if isinstance(response.message, dict):
-            content = response.message.get('content', [])
-            if isinstance(content, list) and content:
-                return content[0].get('text', str(response.message))
+        # Runs on the app's event loop; sync tools are dispatched to worker threads
+        response = await _unified_agent().invoke_async(user_input)
         
-        return str(response.message)
+        # Extract response text; fall back to the raw message for other shapes
+        message = response.message
+        try:
+            return message['content'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            return str(message)
         
     except Exception as e:
         return f"Error processing request: {str(e)}"
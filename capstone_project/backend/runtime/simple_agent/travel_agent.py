@@ -1,7 +1,10 @@
 from strands import Agent, tool
 from strands.models import BedrockModel
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
+import os
 import json
+from types import MappingProxyType
+from botocore.config import Config
 
 # Initialize AgentCore Runtime App
 app = BedrockAgentCoreApp()
@@ -32,34 +35,43 @@ def calculate_budget(total_budget: int, days: int):
         "allocation": allocation
     }
 
+# Destination facts, built once at import and read-only at the top level
+_DESTINATIONS = MappingProxyType({
+    "rome": {
+        "country": "Italy",
+        "currency": "EUR",
+        "language": "Italian",
+        "attractions": ["Colosseum", "Vatican", "Trevi Fountain"]
+    },
+    "florence": {
+        "country": "Italy",
+        "currency": "EUR",
+        "language": "Italian",
+        "attractions": ["Uffizi Gallery", "Ponte Vecchio", "Duomo"]
+    },
+    "venice": {
+        "country": "Italy",
+        "currency": "EUR",
+        "language": "Italian",
+        "attractions": ["St. Mark's Square", "Grand Canal", "Doge's Palace"]
+    }
+})
+_NOT_FOUND = {"error": "Destination not found"}
+
 @tool
 def get_destination_info(destination: str):
     """Get basic information about a travel destination"""
-    destinations = {
-        "rome": {
-            "country": "Italy",
-            "currency": "EUR",
-            "language": "Italian",
-            "attractions": ["Colosseum", "Vatican", "Trevi Fountain"]
-        },
-        "florence": {
-            "country": "Italy",
-            "currency": "EUR",
-            "language": "Italian",
-            "attractions": ["Uffizi Gallery", "Ponte Vecchio", "Duomo"]
-        },
-        "venice": {
-            "country": "Italy",
-            "currency": "EUR",
-            "language": "Italian",
-            "attractions": ["St. Mark's Square", "Grand Canal", "Doge's Palace"]
-        }
-    }
-    return destinations.get(destination.lower(), {"error": "Destination not found"})
+    return _DESTINATIONS.get(destination.lower(), _NOT_FOUND)
 
 # Initialize model and agent
 model_id = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
-model = BedrockModel(model_id=model_id)
+model = BedrockModel(
+    model_id=model_id,
+    boto_client_config=Config(max_pool_connections=int(os.environ.get("BEDROCK_MAX_PARALLEL", "50"))),
+    # Latency-optimized inference is opt-in: it costs more per token and is only offered for some models
+    **({"additional_args": {"performanceConfig": {"latency": "optimized"}}}
+       if os.environ.get("LATENCY_OPTIMIZED", "false").lower() == "true" else {})
+)
 
 system_prompt = """
 You are an AI Travel Companion specializing in planning trips to Italy. 
@@ -87,7 +99,10 @@ def invoke_travel_agent(payload):
     print(f"User input: {user_input}")
     
     response = travel_agent(user_input)
-    agent_response = response.message['content'][0]['text']
+    try:
+        agent_response = response.message['content'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        agent_response = str(response.message)
     
     return agent_response
 
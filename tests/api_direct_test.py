@@ -5,53 +5,77 @@ Test external APIs directly (bypassing the gateway) for comparison and debugging
 This helps verify if issues are with the gateway integration or the APIs themselves.
 """
 
+import sys
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class DirectAPITester:
     """Test external APIs directly"""
     
-    def __init__(self):
-        """Initialize with API keys (should be loaded from environment)"""
+    def __init__(self, verbose: bool = True):
+        """Initialize with API keys (should be loaded from environment)
+        
+        Args:
+            verbose: Print per-API details; machine callers can pass False
+                and use the returned data only
+        """
+        self.verbose = verbose
+        
         # Note: In production, these should come from environment variables
         self.api_keys = {
             "EXCHANGERATE_API_KEY": "",
             "OPENWEATHERMAP_API_KEY": "",
             "AVIATIONSTACK_API_KEY": ""
         }
+        
+        # One pooled session so repeated tests reuse TLS connections
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504])
+        ))
     
     def test_currency_api(self, from_currency: str = "USD", to_currency: str = "EUR") -> Optional[Dict[str, Any]]:
         """Test ExchangeRate-API directly"""
-        print(f"🔄 Testing Currency API: {from_currency} -> {to_currency}")
+        lines = [f"🔄 Testing Currency API: {from_currency} -> {to_currency}"]
         
         api_key = self.api_keys["EXCHANGERATE_API_KEY"]
         url = f"https://v6.exchangerate-api.com/v6/{api_key}/pair/{from_currency}/{to_currency}"
         
         try:
-            response = requests.get(url, timeout=10)
-            print(f"   Status: {response.status_code}")
+            response = self.session.get(url, timeout=10)
+            lines.append(f"   Status: {response.status_code}")
             
             if response.status_code == 200:
                 data = response.json()
-                print("✅ Currency API - Success")
-                print(f"   Base: {data.get('base_code')}")
-                print(f"   Target: {data.get('target_code')}")
-                print(f"   Rate: {data.get('conversion_rate')}")
+                lines.append("✅ Currency API - Success")
+                if self.verbose:
+                    lines.append(f"   Base: {data.get('base_code')}")
+                    lines.append(f"   Target: {data.get('target_code')}")
+                    lines.append(f"   Rate: {data.get('conversion_rate')}")
                 return data
             else:
-                print(f"❌ Currency API - Failed")
-                print(f"   Response: {response.text}")
+                lines.append(f"❌ Currency API - Failed")
+                lines.append(f"   Response: {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"❌ Currency API - Exception: {e}")
+            lines.append(f"❌ Currency API - Exception: {e}")
             return None
+        finally:
+            # One write per test keeps output grouped when tests run concurrently
+            if self.verbose:
+                sys.stdout.write("\n".join(lines) + "\n")
     
     def test_weather_api(self, city: str = "Rome,IT") -> Optional[Dict[str, Any]]:
         """Test OpenWeatherMap API directly"""
-        print(f"🔄 Testing Weather API: {city}")
+        lines = [f"🔄 Testing Weather API: {city}"]
         
         api_key = self.api_keys["OPENWEATHERMAP_API_KEY"]
         url = f"https://api.openweathermap.org/data/2.5/weather"
@@ -62,28 +86,33 @@ class DirectAPITester:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            print(f"   Status: {response.status_code}")
+            response = self.session.get(url, params=params, timeout=10)
+            lines.append(f"   Status: {response.status_code}")
             
             if response.status_code == 200:
                 data = response.json()
-                print("✅ Weather API - Success")
-                print(f"   City: {data.get('name')}")
-                print(f"   Temperature: {data.get('main', {}).get('temp')}°C")
-                print(f"   Description: {data.get('weather', [{}])[0].get('description')}")
+                lines.append("✅ Weather API - Success")
+                if self.verbose:
+                    lines.append(f"   City: {data.get('name')}")
+                    lines.append(f"   Temperature: {data.get('main', {}).get('temp')}°C")
+                    lines.append(f"   Description: {data.get('weather', [{}])[0].get('description')}")
                 return data
             else:
-                print(f"❌ Weather API - Failed")
-                print(f"   Response: {response.text}")
+                lines.append(f"❌ Weather API - Failed")
+                lines.append(f"   Response: {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"❌ Weather API - Exception: {e}")
+            lines.append(f"❌ Weather API - Exception: {e}")
             return None
+        finally:
+            # One write per test keeps output grouped when tests run concurrently
+            if self.verbose:
+                sys.stdout.write("\n".join(lines) + "\n")
     
     def test_flight_api(self, dep_iata: str = "JFK", arr_iata: str = "FCO", limit: int = 5) -> Optional[Dict[str, Any]]:
         """Test Aviationstack API directly"""
-        print(f"🔄 Testing Flight API: {dep_iata} -> {arr_iata}")
+        lines = [f"🔄 Testing Flight API: {dep_iata} -> {arr_iata}"]
         
         api_key = self.api_keys["AVIATIONSTACK_API_KEY"]
         url = "https://api.aviationstack.com/v1/flights"
@@ -95,48 +124,52 @@ class DirectAPITester:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            print(f"   Status: {response.status_code}")
+            response = self.session.get(url, params=params, timeout=10)
+            lines.append(f"   Status: {response.status_code}")
             
             if response.status_code == 200:
                 data = response.json()
-                print("✅ Flight API - Success")
-                
-                flights = data.get('data', [])
-                print(f"   Found {len(flights)} flights")
+                lines.append("✅ Flight API - Success")
                 
-                for i, flight in enumerate(flights[:3]):  # Show first 3
-                    airline = flight.get('airline', {}).get('name', 'Unknown')
-                    flight_num = flight.get('flight', {}).get('iata', 'Unknown')
-                    status = flight.get('flight_status', 'Unknown')
-                    print(f"   Flight {i+1}: {airline} {flight_num} - {status}")
+                if self.verbose:
+                    flights = data.get('data', [])
+                    lines.append(f"   Found {len(flights)} flights")
+                    
+                    for i, flight in enumerate(flights[:3]):  # Show first 3
+                        airline = flight.get('airline', {}).get('name', 'Unknown')
+                        flight_num = flight.get('flight', {}).get('iata', 'Unknown')
+                        status = flight.get('flight_status', 'Unknown')
+                        lines.append(f"   Flight {i+1}: {airline} {flight_num} - {status}")
                 
                 return data
             else:
-                print(f"❌ Flight API - Failed")
-                print(f"   Response: {response.text}")
+                lines.append(f"❌ Flight API - Failed")
+                lines.append(f"   Response: {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"❌ Flight API - Exception: {e}")
+            lines.append(f"❌ Flight API - Exception: {e}")
             return None
+        finally:
+            # One write per test keeps output grouped when tests run concurrently
+            if self.verbose:
+                sys.stdout.write("\n".join(lines) + "\n")
+    
+    def close(self):
+        """Close the pooled connections held by the session"""
+        self.session.close()
     
     def run_all_tests(self):
         """Run all direct API tests"""
         print("🧪 Running Direct API Tests")
         print("=" * 50)
         
-        # Test Currency API
-        self.test_currency_api()
-        print()
-        
-        # Test Weather API
-        self.test_weather_api()
-        print()
-        
-        # Test Flight API
-        self.test_flight_api()
-        print()
+        # The three APIs are independent, so their requests run concurrently
+        tests = (self.test_currency_api, self.test_weather_api, self.test_flight_api)
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            for future in as_completed([executor.submit(test) for test in tests]):
+                future.result()
+                print()
         
         print("=" * 50)
         print("✅ Direct API testing complete")
@@ -145,7 +178,10 @@ class DirectAPITester:
 def main():
     """Main function to run direct API tests"""
     tester = DirectAPITester()
-    tester.run_all_tests()
+    try:
+        tester.run_all_tests()
+    finally:
+        tester.close()
 
 
 if __name__ == "__main__":